@@ -1,10 +1,15 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin
 from .models import Member, Continent, Country, Industry, Company, PageVisit
 from django import forms
 from django.contrib.auth.forms import ReadOnlyPasswordHashField
+from django.core.paginator import Paginator
 from datetime import timedelta
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.functional import cached_property
+import functools
 
 class MemberCreationForm(forms.ModelForm):
     password1 = forms.CharField(label='Password', widget=forms.PasswordInput)
@@ -29,10 +34,32 @@ class MemberCreationForm(forms.ModelForm):
         return user
 
 class MemberChangeForm(forms.ModelForm):
-    password = ReadOnlyPasswordHashField()
     class Meta:
         model = Member
-        fields = ('username', 'email', 'password', 'expiry_date', 'is_active')
+        fields = ('username', 'email', 'expiry_date', 'is_active')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Only an existing member has a hash worth displaying.
+        if self.instance and self.instance.pk:
+            self.fields['password'] = ReadOnlyPasswordHashField()
+
+def _expiry_window(request):
+    # Memoized on the request so repeated filter calls reuse the same dates.
+    window = getattr(request, '_expiry_window', None)
+    if window is None:
+        today = timezone.now().date()
+        window = request._expiry_window = (today, today + timedelta(days=30))
+    return window
+
+@functools.lru_cache(maxsize=4)
+def _expiry_lookups(today, soon):
+    # Built once per date; only the date parameters ever change between requests.
+    return {
+        'active': Q(is_active=True, expiry_date__gte=today),
+        # Narrow to primary keys so the outer changelist query joins on a PK-only subquery.
+        'soon': Q(pk__in=Member.objects.filter(is_active=True, expiry_date__range=(today, soon)).values('pk')),
+    }
 
 class ExpiryFilter(admin.SimpleListFilter):
     title = 'Expiry Status'
@@ -44,24 +71,26 @@ class ExpiryFilter(admin.SimpleListFilter):
             ('soon', 'Expiring Soon'),
         )
     def queryset(self, request, queryset):
-        today = timezone.now().date()
-        soon = today + timedelta(days=30)
-        if self.value() == 'active':
-            return queryset.filter(is_active=True, expiry_date__gte=today)
-        if self.value() == 'inactive':
+        value = self.value()
+        if value is None:
+            return queryset
+        if value == 'inactive':
             return queryset.filter(is_active=False)
-        if self.value() == 'soon':
-            return queryset.filter(is_active=True, expiry_date__range=(today, soon))
-        return queryset
+        lookup = _expiry_lookups(*_expiry_window(request)).get(value)
+        if lookup is None:
+            return queryset
+        return queryset.filter(lookup)
 
 class MemberAdmin(UserAdmin):
     add_form = MemberCreationForm
     form = MemberChangeForm
     model = Member
-    list_display = ('username', 'email', 'join_date', 'expiry_date', 'is_active')
+    list_display = ('username', 'email', 'join_date', 'expiry_date', 'active_flag')
     list_filter = (ExpiryFilter,)
     search_fields = ('username', 'email')
-    ordering = ('expiry_date',)
+    ordering = ('-expiry_date',)
+    list_per_page = 50
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('username', 'email', 'password')}),
         ('Membership', {'fields': ('join_date', 'expiry_date', 'is_active')}),
@@ -73,9 +102,109 @@ class MemberAdmin(UserAdmin):
         }),
     )
 
+    @admin.display(boolean=True, description='Active', ordering='is_active')
+    def active_flag(self, obj):
+        return obj.is_active
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only list views (changelist and autocomplete) search; they render list_display
+        # columns, while the change form still loads the full row via get_queryset.
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        return queryset.only('username', 'email', 'join_date', 'expiry_date', 'is_active'), may_have_duplicates
+
+# Query parameter carrying the keyset cursor: the id of the last visit on the previous page.
+PAGEVISIT_CURSOR_VAR = 'before'
+
+class PageVisitPaginator(Paginator):
+    """Keyset pagination for the newest-first visit list.
+
+    Each page is ``pk < cursor ORDER BY -id LIMIT per_page`` instead of an OFFSET
+    scan, so older pages cost the same as the first. Ids are sparse (rows are merged
+    and deleted, and the minute upsert consumes sequence values), so page contents
+    come only from the cursor, never from id arithmetic. Lists sorted any other way
+    use the regular paginator.
+    """
+    def __init__(self, object_list, per_page, cursor=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cursor = cursor
+        self.next_cursor = None
+
+    @cached_property
+    def uses_keyset(self):
+        query = self.object_list.query
+        return bool(query.order_by) and set(query.order_by) <= {'-id', '-pk'}
+
+    def page(self, number):
+        if not self.uses_keyset:
+            return super().page(number)
+        window = self.object_list
+        if self.cursor is not None:
+            window = window.filter(pk__lt=self.cursor)
+        # One extra row tells us whether an older page exists.
+        rows = list(window[:self.per_page + 1])
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            self.next_cursor = rows[-1].pk
+        return self._get_page(rows, 1, self)
+
+class PageVisitChangeList(ChangeList):
+    """Changelist that renders one keyset page and never counts the table."""
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        if not paginator.uses_keyset:
+            return super().get_results(request)
+        self.result_list = paginator.page(1).object_list
+        self.result_count = len(self.result_list)
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        # Navigation comes from the cursor links, not page numbers or "show all".
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = paginator
+
+class PageVisitAdmin(admin.ModelAdmin):
+    list_display = ('path', 'timestamp', 'count')
+    ordering = ('-id',)
+    sortable_by = ()
+    list_per_page = 100
+    show_full_result_count = False
+    paginator = PageVisitPaginator
+    readonly_fields = [f.name for f in PageVisit._meta.fields]
+
+    def get_changelist(self, request, **kwargs):
+        return PageVisitChangeList
+
+    def get_changelist_instance(self, request):
+        # Take the cursor out of GET so the changelist doesn't treat it as a field lookup.
+        request.GET = request.GET.copy()
+        cursor = request.GET.pop(PAGEVISIT_CURSOR_VAR, [None])[-1]
+        request._pagevisit_cursor = int(cursor) if cursor and cursor.isdigit() else None
+        cl = super().get_changelist_instance(request)
+        # Links for admin/core/pagevisit/pagination.html, keeping any other query parameters.
+        cl.newest_page_url = cl.get_query_string() if request._pagevisit_cursor else None
+        next_cursor = getattr(cl.paginator, 'next_cursor', None)
+        cl.older_page_url = cl.get_query_string({PAGEVISIT_CURSOR_VAR: next_cursor}) if next_cursor else None
+        return cl
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        return self.paginator(
+            queryset, per_page, cursor=getattr(request, '_pagevisit_cursor', None),
+            orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
 admin.site.register(Member, MemberAdmin)
 admin.site.register(Continent)
 admin.site.register(Country)
 admin.site.register(Industry)
 admin.site.register(Company)
-admin.site.register(PageVisit)
+admin.site.register(PageVisit, PageVisitAdmin)
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+# Columns read on every request: session hash verification needs the password,
+# permission checks need the flags, the shared templates show username/expiry and
+# the admin header shows get_short_name() (first_name).
+SESSION_USER_FIELDS = (
+    'password', 'last_login', 'username', 'first_name', 'is_active', 'is_staff', 'is_superuser', 'expiry_date',
+)
+
+
+class MemberBackend(ModelBackend):
+    """ModelBackend that loads only the member columns needed per request."""
+
+    def get_user(self, user_id):
+        try:
+            user = UserModel._default_manager.only(*SESSION_USER_FIELDS).get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
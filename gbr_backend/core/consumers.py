@@ -1,20 +1,130 @@
+import asyncio
+import functools
 import json
+import logging
+import time
+import orjson
 from channels.generic.websocket import AsyncWebsocketConsumer
 from django.contrib.auth import get_user_model
 from .models import Company, ChatMessage
 from channels.db import database_sync_to_async
-from django.utils import timezone
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Messages arriving within this window (seconds) are broadcast as one batch.
+CHAT_BATCH_WINDOW = 0.03
+
+
+@functools.lru_cache(maxsize=1024)
+def _known_company(company_id):
+    # lru_cache does not store raised exceptions, so only existing companies are cached;
+    # unknown ids are re-checked every time and cannot evict real entries.
+    if not Company.objects.filter(pk=company_id).exists():
+        raise LookupError(company_id)
+    return True
+
+
+def _company_exists(company_id):
+    try:
+        return _known_company(company_id)
+    except LookupError:
+        return False
+
+
+class _RoomBatch:
+    """Chat messages queued in this process for one room.
+
+    The batch owns the task that broadcasts and saves them once per window. All access
+    happens on the event loop and the queues are swapped before any await, so no lock
+    is needed. The last local socket to leave closes the batch, flushing what is queued.
+    """
+    def __init__(self, room, channel_layer):
+        self.room = room
+        self.channel_layer = channel_layer
+        self.sockets = 0
+        self.messages = []
+        self.records = []
+        self._task = None
+        self._sleeping = False
+
+    def add(self, message, record=None):
+        self.messages.append(message)
+        if record is not None:
+            self.records.append(record)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        # Drain batches in order; stop once a window passes with nothing queued, so a
+        # later batch can never overtake an earlier one.
+        try:
+            while True:
+                self._sleeping = True
+                try:
+                    await asyncio.sleep(CHAT_BATCH_WINDOW)
+                finally:
+                    self._sleeping = False
+                if not await self.flush():
+                    return
+        finally:
+            self._task = None
+
+    async def flush(self):
+        messages, self.messages = self.messages, []
+        records, self.records = self.records, []
+        if not messages:
+            return False
+        # Broadcast first: delivery must not wait for the database write.
+        await self.channel_layer.group_send(self.room, {
+            'type': 'chat_message_batch',
+            'messages': messages,
+        })
+        if records:
+            # A failed insert (e.g. a company or user deleted meanwhile) is logged, not retried.
+            try:
+                await database_sync_to_async(ChatMessage.objects.bulk_create)(records, batch_size=500)
+            except Exception:
+                logger.exception('Failed to persist %d chat messages for %s', len(records), self.room)
+        return True
+
+    async def close(self):
+        task = self._task
+        if task is not None:
+            # Only interrupt the wait; a flush already under way is left to finish.
+            if self._sleeping:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+
+# Open batches by room group name.
+_room_batches = {}
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """Room chat for one company.
+
+    Outgoing batches are sent as ``{"ts_base", "username"?, "messages": [{"message",
+    "ts_offset_ms", "username"?}]}``; usernames appear only when they change on this socket.
+    """
     async def connect(self):
         self.company_id = self.scope['url_route']['kwargs']['company_id']
         self.room_group_name = f'chat_{self.company_id}'
+        if not await database_sync_to_async(_company_exists)(int(self.company_id)):
+            await self.close()
+            return
         await self.channel_layer.group_add(
             self.room_group_name,
             self.channel_name
         )
+        self.batch = _room_batches.get(self.room_group_name)
+        if self.batch is None:
+            self.batch = _room_batches[self.room_group_name] = _RoomBatch(self.room_group_name, self.channel_layer)
+        self.batch.sockets += 1
         await self.accept()
 
     async def disconnect(self, close_code):
@@ -22,33 +132,71 @@ class ChatConsumer(AsyncWebsocketConsumer):
             self.room_group_name,
             self.channel_name
         )
+        batch = getattr(self, 'batch', None)
+        if batch is None:
+            return
+        batch.sockets -= 1
+        if batch.sockets == 0:
+            if _room_batches.get(self.room_group_name) is batch:
+                del _room_batches[self.room_group_name]
+            await batch.close()
 
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = orjson.loads(text_data)
         message = data['message']
         user = self.scope['user']
-        await self.save_message(user, self.company_id, message)
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message,
-                'username': user.username if user.is_authenticated else 'Anonymous',
-                'timestamp': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
-            }
-        )
+        self.batch.add({
+            'message': message,
+            'username': user.username if user.is_authenticated else 'Anonymous',
+            'ts': time.time_ns() // 1_000_000,
+        }, self._message_record(user, message))
 
     async def chat_message(self, event):
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=orjson.dumps(self._compact({
             'message': event['message'],
             'username': event['username'],
             'timestamp': event['timestamp'],
-        }))
+        })).decode())
+
+    async def chat_message_batch(self, event):
+        await self.send(text_data=orjson.dumps(self._envelope(event['messages'])).decode())
+
+    def _compact(self, msg):
+        # Drop fields the client already has from the previous frame on this socket.
+        if msg['username'] == getattr(self, '_last_sent_username', None):
+            del msg['username']
+        else:
+            self._last_sent_username = msg['username']
+        if msg['timestamp'] == getattr(self, '_last_sent_ts', None):
+            del msg['timestamp']
+        else:
+            self._last_sent_ts = msg['timestamp']
+        return msg
+
+    def _envelope(self, messages):
+        # One header per batch: the first sender and the base time (epoch ms) go on the
+        # envelope, and each message carries its offset from ts_base plus a username only
+        # when the sender changes. The header username is dropped if the socket already has it.
+        ts_base = messages[0]['ts']
+        username = messages[0]['username']
+        envelope = {'ts_base': ts_base}
+        if username != getattr(self, '_last_sent_username', None):
+            envelope['username'] = username
+        items = []
+        for msg in messages:
+            item = {'message': msg['message'], 'ts_offset_ms': msg['ts'] - ts_base}
+            if msg['username'] != username:
+                username = item['username'] = msg['username']
+            items.append(item)
+        envelope['messages'] = items
+        self._last_sent_username = username
+        return envelope
 
-    @database_sync_to_async
-    def save_message(self, user, company_id, message):
-        company = Company.objects.get(id=company_id)
-        ChatMessage.objects.create(user=user, company=company, message=message)
+    def _message_record(self, user, message):
+        # Only authenticated members can own a ChatMessage row.
+        if user.is_authenticated:
+            return ChatMessage(user_id=user.id, company_id=self.company_id, message=message)
+        return None
 
 
 # --- VideoCallConsumer for WebRTC signaling ---
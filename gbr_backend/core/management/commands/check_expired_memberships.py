@@ -1,12 +1,48 @@
-from django.core.management.base import BaseCommand
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Now
 from django.utils import timezone
-from core.models import Member
+from core.models import Member, SystemState
+
+LAST_CHECK_KEY = 'membership_last_check'
 
 class Command(BaseCommand):
     help = 'Checks for expired memberships and deactivates them.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Number of members to deactivate per UPDATE statement'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Scan every active member instead of only those expired since the last run'
+        )
+
     def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer.')
         today = timezone.now().date()
         expired_members = Member.objects.filter(expiry_date__lt=today, is_active=True)
-        count = expired_members.update(is_active=False)
+        state = SystemState.objects.filter(key=LAST_CHECK_KEY).first()
+        if state and not kwargs['full']:
+            # Members that expired before the last run were already deactivated then.
+            expired_members = expired_members.filter(expiry_date__gte=date.fromisoformat(state.value))
+        count = 0
+        cursor = 0
+        # Walk the primary key in bounded chunks to keep each UPDATE's lock footprint small.
+        while True:
+            pks = list(
+                expired_members.filter(pk__gt=cursor).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            count += Member.objects.filter(pk__in=pks).update(is_active=False, deactivated_at=Now())
+            cursor = pks[-1]
+        # Only advance the high-water mark once every expired member has been processed.
+        SystemState.objects.update_or_create(key=LAST_CHECK_KEY, defaults={'value': today.isoformat()})
         self.stdout.write(self.style.SUCCESS(f'Deactivated {count} expired members.'))
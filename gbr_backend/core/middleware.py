@@ -1,10 +1,102 @@
+import atexit
+import collections
+import logging
+import threading
+import time
+
 from core.models import PageVisit
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
+logger = logging.getLogger(__name__)
+
+_SKIP_PREFIXES = ('/admin', '/static', '/media', '/favicon.ico', '/healthz', '/robots.txt')
+
+FLUSH_INTERVAL = 1
+
+# Visit counts keyed by (path, start of minute), merged into PageVisit on flush.
+_counts = collections.Counter()
+_lock = threading.Lock()
+_flusher = None
+
+
+def _upsert_sql():
+    # On PostgreSQL every upsert consumes a sequence value even when it updates an existing
+    # row, so PageVisit ids are sparse; the admin pages by keyset cursor rather than id ranges.
+    qn = connection.ops.quote_name
+    table = qn(PageVisit._meta.db_table)
+    return (
+        f'INSERT INTO {table} ({qn("path")}, {qn("timestamp")}, {qn("count")}) VALUES (%s, %s, %s) '
+        f'ON CONFLICT ({qn("path")}, {qn("timestamp")}) '
+        f'DO UPDATE SET {qn("count")} = {table}.{qn("count")} + EXCLUDED.{qn("count")}'
+    )
+
+
+def flush_page_visits():
+    """Add the buffered counts to their per-minute PageVisit rows."""
+    global _counts
+    with _lock:
+        counts, _counts = _counts, collections.Counter()
+    if not counts:
+        return
+    adapt = connection.ops.adapt_datetimefield_value
+    try:
+        # All or nothing, so a failed flush can be retried without double counting.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(_upsert_sql(), [
+                (path, adapt(minute), n) for (path, minute), n in counts.items()
+            ])
+    except Exception:
+        # Put the counts back for the next flush, merged with visits recorded meanwhile.
+        with _lock:
+            _counts.update(counts)
+        raise
+
+
+def _run_flusher():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush_page_visits()
+        except Exception:
+            logger.exception('Failed to flush page visits')
+        finally:
+            close_old_connections()
+
+
+def _start_flusher():
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run_flusher, name='pagevisit-flusher', daemon=True)
+            _flusher.start()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        flush_page_visits()
+    except Exception:
+        logger.exception('Failed to flush page visits at exit')
+
+
 class PageVisitMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        # Checked when the handler loads middleware, so tests and settings overrides apply.
+        if not getattr(settings, 'PAGE_VISIT_LOGGING_ENABLED', True):
+            raise MiddlewareNotUsed('PAGE_VISIT_LOGGING_ENABLED is False')
+        super().__init__(get_response)
+
     def process_view(self, request, view_func, view_args, view_kwargs):
         path = request.path
-        if path.startswith('/admin') or path.startswith('/static'):
+        if path.startswith(_SKIP_PREFIXES):
             return None
-        PageVisit.objects.create(path=path)
-        return None
\ No newline at end of file
+        minute = timezone.now().replace(second=0, microsecond=0)
+        with _lock:
+            _counts[(path, minute)] += 1
+        if _flusher is None:
+            _start_flusher()
+        return None
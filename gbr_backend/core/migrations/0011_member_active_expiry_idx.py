@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0010_page_member_member_expiry_idx_page_created_by'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['is_active', 'expiry_date'], name='member_active_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_member_active_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SystemState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('value', models.CharField(max_length=255)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
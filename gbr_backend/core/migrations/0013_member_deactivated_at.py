@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_systemstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='member',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
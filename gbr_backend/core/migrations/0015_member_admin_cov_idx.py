@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0014_member_search_trgm'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='member',
+            name='member_expiry_idx',
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(fields=['expiry_date', 'id'], include=('username', 'email', 'is_active', 'join_date'), name='member_admin_cov_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_member_admin_cov_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pagevisit',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:09
+
+from django.db import migrations, models
+from django.db.models.functions import TruncMinute
+
+
+def merge_into_minute_buckets(apps, schema_editor):
+    # Set-based so it scales to large visit tables: no rows are loaded into Python.
+    PageVisit = apps.get_model('core', 'PageVisit')
+    # Snap every visit to the start of its minute; duplicates are allowed until the constraint is added.
+    PageVisit.objects.update(timestamp=TruncMinute('timestamp'))
+    table = schema_editor.quote_name(PageVisit._meta.db_table)
+    # The lowest id of each duplicated (path, minute) bucket keeps the row and the bucket's total.
+    schema_editor.execute(
+        f'CREATE TEMPORARY TABLE pagevisit_merge AS '
+        f'SELECT MIN(id) AS keep_id, SUM(count) AS total FROM {table} '
+        f'GROUP BY path, timestamp HAVING COUNT(*) > 1'
+    )
+    schema_editor.execute('CREATE INDEX pagevisit_merge_keep ON pagevisit_merge (keep_id)')
+    schema_editor.execute(
+        f'UPDATE {table} SET count = (SELECT total FROM pagevisit_merge WHERE keep_id = {table}.id) '
+        f'WHERE id IN (SELECT keep_id FROM pagevisit_merge)'
+    )
+    schema_editor.execute(
+        f'DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY path, timestamp)'
+    )
+    schema_editor.execute('DROP TABLE pagevisit_merge')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_pagevisit_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pagevisit',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(merge_into_minute_buckets, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pagevisit',
+            constraint=models.UniqueConstraint(fields=('path', 'timestamp'), name='pagevisit_path_minute_uniq'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_pagevisit_minute_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='sort_order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='country',
+            name='sort_order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='industry',
+            name='sort_order',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['industry', 'sort_order'], name='company_ind_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['industry', 'name'], name='company_ind_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['continent', 'sort_order'], name='country_cont_sort_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='industry',
+            index=models.Index(fields=['country', 'sort_order'], name='industry_cty_sort_idx'),
+        ),
+    ]
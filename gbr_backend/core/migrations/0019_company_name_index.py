@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_sort_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='name',
+            field=models.CharField(db_index=True, max_length=150),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:13
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def _rename_duplicates(model, group_fields):
+    # Keep the oldest row's name in each group and suffix the others with their id, so
+    # existing data satisfies the new unique constraints without merging or deleting rows.
+    max_length = model._meta.get_field('name').max_length
+    groups = model.objects.values(*group_fields).annotate(rows=Count('id')).filter(rows__gt=1)
+    for group in list(groups):
+        del group['rows']
+        for row in model.objects.filter(**group).order_by('id')[1:]:
+            suffix = f' ({row.pk})'
+            row.name = row.name[:max_length - len(suffix)] + suffix
+            row.save(update_fields=['name'])
+
+
+def rename_duplicate_locations(apps, schema_editor):
+    _rename_duplicates(apps.get_model('core', 'Continent'), ['name'])
+    _rename_duplicates(apps.get_model('core', 'Country'), ['name'])
+    _rename_duplicates(apps.get_model('core', 'Industry'), ['country', 'name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_company_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_duplicate_locations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='continent',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='country',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='industry',
+            constraint=models.UniqueConstraint(fields=('country', 'name'), name='industry_country_name_uniq'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_unique_location_names'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagevisit',
+            index=models.Index(fields=['-timestamp'], name='pagevisit_timestamp_idx'),
+        ),
+    ]
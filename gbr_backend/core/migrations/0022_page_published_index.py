@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-15 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_pagevisit_timestamp_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='page',
+            index=models.Index(fields=['is_published', '-created_at'], name='page_published_created_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+# Serves the admin changelist (ORDER BY -expiry_date, -id) as an index-only scan.
+# INCLUDE is PostgreSQL-only, so other backends get the plain ordering index.
+INDEX_NAME = 'member_admin_cov_idx'
+
+
+def create_admin_index(apps, schema_editor):
+    include = ''
+    if schema_editor.connection.vendor == 'postgresql':
+        include = ' INCLUDE (username, email, is_active, join_date)'
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON core_member (expiry_date, id){include}'
+    )
+
+
+def drop_admin_index(apps, schema_editor):
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_page_published_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='member',
+            name='member_admin_cov_idx',
+        ),
+        migrations.RunPython(create_admin_index, drop_admin_index),
+    ]
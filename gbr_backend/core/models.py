@@ -10,6 +10,7 @@ class Member(AbstractUser):
     join_date = models.DateField(default=timezone.now)
     expiry_date = models.DateField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
+    deactivated_at = models.DateTimeField(null=True, blank=True)
     groups = models.ManyToManyField(Group, related_name='member_groups', blank=True)
     user_permissions = models.ManyToManyField(Permission, related_name='member_permissions', blank=True)
     PAYMENT_STATUS_CHOICES = [
@@ -27,38 +28,78 @@ class Member(AbstractUser):
     class Meta:
         verbose_name = "Member"
         verbose_name_plural = "Members"
+        # member_admin_cov_idx (expiry_date, id), covering the admin changelist columns on
+        # PostgreSQL, is created by migration 0023 since INCLUDE is backend-specific.
+        indexes = [
+            models.Index(fields=['is_active', 'expiry_date'], name='member_active_expiry_idx'),
+        ]
 
 class Continent(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     def __str__(self):
         return self.name
 
 class Country(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
     continent = models.ForeignKey(Continent, on_delete=models.CASCADE, related_name='countries')
+    sort_order = models.PositiveIntegerField(default=0)
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['continent', 'sort_order'], name='country_cont_sort_idx'),
+        ]
+
 class Industry(models.Model):
     name = models.CharField(max_length=100)
     country = models.ForeignKey(Country, on_delete=models.CASCADE, related_name='industries')
+    sort_order = models.PositiveIntegerField(default=0)
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['country', 'sort_order'], name='industry_cty_sort_idx'),
+        ]
+        constraints = [
+            # Industry names repeat across countries, so uniqueness is per country
+            models.UniqueConstraint(fields=['country', 'name'], name='industry_country_name_uniq'),
+        ]
+
 class Company(models.Model):
-    name = models.CharField(max_length=150)
+    # On PostgreSQL db_index also creates a varchar_pattern_ops index for LIKE 'prefix%' lookups
+    name = models.CharField(max_length=150, db_index=True)
     industry = models.ForeignKey(Industry, on_delete=models.CASCADE, related_name='companies')
     description = models.TextField()
     contact_info = models.CharField(max_length=255)
     chat_code = models.CharField(max_length=255, blank=True)
+    sort_order = models.PositiveIntegerField(default=0)
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['industry', 'sort_order'], name='company_ind_sort_idx'),
+            models.Index(fields=['industry', 'name'], name='company_ind_name_idx'),
+        ]
+
 class PageVisit(models.Model):
+    """Visits to a path, aggregated per minute (timestamp is the start of the minute)"""
     path = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+    count = models.PositiveIntegerField(default=1)
     def __str__(self):
-        return f"{self.path} at {self.timestamp}"
+        return f"{self.path} at {self.timestamp} ({self.count})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['path', 'timestamp'], name='pagevisit_path_minute_uniq'),
+        ]
+        indexes = [
+            # The unique constraint leads with path; analytics filters on timestamp ranges alone.
+            models.Index(fields=['-timestamp'], name='pagevisit_timestamp_idx'),
+        ]
 
 
 class Page(models.Model):
@@ -77,6 +118,9 @@ class Page(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_published', '-created_at'], name='page_published_created_idx'),
+        ]
 
 class ChatMessage(models.Model):
     user = models.ForeignKey(Member, on_delete=models.CASCADE)
@@ -85,3 +129,11 @@ class ChatMessage(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     def __str__(self):
         return f"{self.user.username}: {self.message[:20]}"
+
+class SystemState(models.Model):
+    """Key/value store for bookkeeping shared by management commands"""
+    key = models.CharField(max_length=100, unique=True)
+    value = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+    def __str__(self):
+        return f"{self.key}={self.value}"
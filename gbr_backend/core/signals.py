@@ -0,0 +1,66 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .consumers import _known_company
+from .models import Company, Continent, Country, Industry
+
+CONTINENTS_CACHE_KEY = 'continents:list:v1'
+COUNTRIES_CACHE_KEY = 'countries:{continent_id}:v1'
+INDUSTRIES_CACHE_KEY = 'industries:{country_id}:v1'
+# Fragment name used by {% cache %} in listings/company_detail.html
+COMPANY_DETAIL_FRAGMENT = 'company_detail'
+
+
+@receiver(post_save, sender=Continent)
+@receiver(post_delete, sender=Continent)
+def invalidate_continents(sender, instance, **kwargs):
+    cache.delete(CONTINENTS_CACHE_KEY)
+
+
+def _remember_parent_id(instance, field):
+    # Read the stored parent before the save so a row moved to another parent is
+    # also dropped from the old parent's cached list.
+    instance._cached_parent_id = (
+        type(instance)._default_manager.filter(pk=instance.pk).values_list(field, flat=True).first()
+        if instance.pk is not None else None
+    )
+
+
+def _parent_ids(instance, field):
+    return {getattr(instance, field), getattr(instance, '_cached_parent_id', None)} - {None}
+
+
+@receiver(pre_save, sender=Country)
+def remember_country_continent(sender, instance, **kwargs):
+    _remember_parent_id(instance, 'continent_id')
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+def invalidate_countries(sender, instance, **kwargs):
+    cache.delete_many([COUNTRIES_CACHE_KEY.format(continent_id=pk) for pk in _parent_ids(instance, 'continent_id')])
+
+
+@receiver(pre_save, sender=Industry)
+def remember_industry_country(sender, instance, **kwargs):
+    _remember_parent_id(instance, 'country_id')
+
+
+@receiver(post_save, sender=Industry)
+@receiver(post_delete, sender=Industry)
+def invalidate_industries(sender, instance, **kwargs):
+    cache.delete_many([INDUSTRIES_CACHE_KEY.format(country_id=pk) for pk in _parent_ids(instance, 'country_id')])
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_detail(sender, instance, **kwargs):
+    cache.delete(make_template_fragment_key(COMPANY_DETAIL_FRAGMENT, [instance.id]))
+
+
+@receiver(post_delete, sender=Company)
+def forget_chat_company(sender, instance, **kwargs):
+    # ChatConsumer caches which company ids exist; a deleted company must stop accepting chats.
+    _known_company.cache_clear()
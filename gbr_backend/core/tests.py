@@ -1,3 +1,216 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import middleware
+from .management.commands.check_expired_memberships import LAST_CHECK_KEY
+from .admin import PAGEVISIT_CURSOR_VAR, PageVisitAdmin
+from .models import Company, Continent, Country, Industry, Member, PageVisit, SystemState
+
+
+class CheckExpiredMembershipsTests(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+
+    def make_member(self, username, expired_days_ago):
+        return Member.objects.create_user(
+            username=username, email=f'{username}@example.com', password='pw',
+            expiry_date=self.today - timedelta(days=expired_days_ago),
+        )
+
+    def run_command(self, *args):
+        call_command('check_expired_memberships', *args, stdout=StringIO())
+
+    def test_incremental_run_deactivates_members_expired_since_last_check(self):
+        SystemState.objects.create(key=LAST_CHECK_KEY, value=(self.today - timedelta(days=5)).isoformat())
+        recent = self.make_member('recent', expired_days_ago=3)
+        self.run_command()
+        recent.refresh_from_db()
+        self.assertFalse(recent.is_active)
+        self.assertEqual(SystemState.objects.get(key=LAST_CHECK_KEY).value, self.today.isoformat())
+
+    def test_rejected_batch_size_does_not_advance_last_check(self):
+        last_check = (self.today - timedelta(days=5)).isoformat()
+        SystemState.objects.create(key=LAST_CHECK_KEY, value=last_check)
+        member = self.make_member('skipped', expired_days_ago=3)
+        for batch_size in ('0', '-1'):
+            with self.assertRaises(CommandError):
+                self.run_command('--batch-size', batch_size)
+        self.assertEqual(SystemState.objects.get(key=LAST_CHECK_KEY).value, last_check)
+        # The next regular run still finds the member.
+        self.run_command()
+        member.refresh_from_db()
+        self.assertFalse(member.is_active)
+
+    def test_small_batches_cover_every_expired_member(self):
+        members = [self.make_member(f'm{i}', expired_days_ago=1) for i in range(5)]
+        active = self.make_member('active', expired_days_ago=-30)
+        self.run_command('--batch-size', '2')
+        self.assertFalse(Member.objects.filter(pk__in=[m.pk for m in members], is_active=True).exists())
+        active.refresh_from_db()
+        self.assertTrue(active.is_active)
+
+
+class PageVisitKeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client.force_login(Member.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pw',
+        ))
+        start = timezone.now().replace(second=0, microsecond=0)
+        visits = [PageVisit.objects.create(path=f'/p{i}/', timestamp=start + timedelta(minutes=i))
+                  for i in range(PageVisitAdmin.list_per_page * 2 + 5)]
+        # Leave gaps in the ids, as merges and upserts do.
+        PageVisit.objects.filter(pk__in=[v.pk for v in visits[::7]]).delete()
+        self.ids = list(PageVisit.objects.order_by('-id').values_list('id', flat=True))
+        self.url = reverse('admin:core_pagevisit_changelist')
+
+    def get_page(self, before=None):
+        params = {PAGEVISIT_CURSOR_VAR: before} if before is not None else {}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in queries.captured_queries))
+        return response.context['cl']
+
+    def test_pages_follow_the_cursor_without_gaps_or_overlap(self):
+        seen = []
+        cl = self.get_page()
+        self.assertIsNone(cl.newest_page_url)
+        while True:
+            page_ids = [visit.pk for visit in cl.result_list]
+            self.assertLessEqual(len(page_ids), PageVisitAdmin.list_per_page)
+            seen.extend(page_ids)
+            if not cl.older_page_url:
+                break
+            cl = self.get_page(before=page_ids[-1])
+            self.assertIsNotNone(cl.newest_page_url)
+        self.assertEqual(seen, self.ids)
+
+    def test_full_last_page_has_no_older_link(self):
+        per_page = PageVisitAdmin.list_per_page
+        cl = self.get_page(before=self.ids[-per_page - 1])
+        self.assertEqual([visit.pk for visit in cl.result_list], self.ids[-per_page:])
+        self.assertIsNone(cl.older_page_url)
+
+    def test_invalid_cursor_shows_newest_page(self):
+        cl = self.get_page(before='abc')
+        self.assertEqual(cl.result_list[0].pk, self.ids[0])
+
+
+class PageVisitFlushTests(TestCase):
+    def setUp(self):
+        middleware._counts.clear()
+        self.addCleanup(middleware._counts.clear)
+        # Count visits without starting the background flusher.
+        patcher = mock.patch.object(middleware, '_flusher', object())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def visit(self, path):
+        request = RequestFactory().get(path)
+        middleware.PageVisitMiddleware(lambda r: None).process_view(request, None, (), {})
+
+    def test_counts_survive_a_failed_write(self):
+        self.visit('/about/')
+        self.visit('/about/')
+        with mock.patch.object(middleware, '_upsert_sql', return_value='INSERT INTO missing_table VALUES (%s, %s, %s)'):
+            with self.assertRaises(DatabaseError):
+                middleware.flush_page_visits()
+        self.visit('/about/')
+        middleware.flush_page_visits()
+        total = PageVisit.objects.filter(path='/about/').aggregate(total=Sum('count'))['total']
+        self.assertEqual(total, 3)
+        self.assertFalse(middleware._counts)
+
+    @override_settings(PAGE_VISIT_LOGGING_ENABLED=False)
+    def test_disabled_logging_removes_the_middleware(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            middleware.PageVisitMiddleware(lambda r: None)
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.europe = Continent.objects.create(name='Europe')
+        self.asia = Continent.objects.create(name='Asia')
+        self.france = Country.objects.create(name='France', continent=self.europe)
+        self.japan = Country.objects.create(name='Japan', continent=self.asia)
+
+    def listed(self, url_name, parent_id, context_name):
+        response = self.client.get(reverse(url_name, args=[parent_id]))
+        return [item['name'] for item in response.context[context_name]]
+
+    def test_countries_follow_a_continent_change(self):
+        self.assertEqual(self.listed('list_countries', self.europe.id, 'countries'), ['France'])
+        self.assertEqual(self.listed('list_countries', self.asia.id, 'countries'), ['Japan'])
+        self.france.continent = self.asia
+        self.france.save()
+        self.assertEqual(self.listed('list_countries', self.europe.id, 'countries'), [])
+        self.assertEqual(self.listed('list_countries', self.asia.id, 'countries'), ['France', 'Japan'])
+
+    def test_industries_follow_a_country_change(self):
+        industry = Industry.objects.create(name='Wine', country=self.france)
+        self.assertEqual(self.listed('list_industries', self.france.id, 'industries'), ['Wine'])
+        self.assertEqual(self.listed('list_industries', self.japan.id, 'industries'), [])
+        industry.country = self.japan
+        industry.save()
+        self.assertEqual(self.listed('list_industries', self.france.id, 'industries'), [])
+        self.assertEqual(self.listed('list_industries', self.japan.id, 'industries'), ['Wine'])
+
+
+class CompanyDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        country = Country.objects.create(name='France', continent=Continent.objects.create(name='Europe'))
+        self.company = Company.objects.create(
+            name='Acme', industry=Industry.objects.create(name='Wine', country=country),
+            description='Cellars', contact_info='acme@example.com',
+        )
+        self.url = reverse('company_detail', args=[self.company.id])
+
+    def test_cached_card_skips_the_company_query(self):
+        self.assertContains(self.client.get(self.url), 'Acme')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Acme')
+        self.assertFalse(any('core_company' in q['sql'] for q in queries.captured_queries))
+
+    def test_saved_company_is_rendered_again(self):
+        self.client.get(self.url)
+        self.company.name = 'Acme Wines'
+        self.company.save()
+        self.assertContains(self.client.get(self.url), 'Acme Wines')
+
+    def test_missing_company_is_not_found(self):
+        self.assertEqual(self.client.get(reverse('company_detail', args=[self.company.id + 1])).status_code, 404)
+
+
+class MemberAdminTests(TestCase):
+    def setUp(self):
+        self.admin = Member.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(self.admin)
+
+    def test_changelist_loads_only_listed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_member_changelist'), {'q': 'adm'})
+        self.assertContains(response, 'admin@example.com')
+        listing = [q['sql'] for q in queries.captured_queries if 'ORDER BY' in q['sql'] and 'core_member' in q['sql']]
+        self.assertTrue(listing)
+        self.assertNotIn('"password"', listing[-1])
+
+    def test_change_form_loads_the_full_row(self):
+        response = self.client.get(reverse('admin:core_member_change', args=[self.admin.pk]))
+        self.assertContains(response, 'admin@example.com')
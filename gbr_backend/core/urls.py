@@ -1,7 +1,18 @@
-from django.urls import path
+from django.urls import include, path
 from django.contrib.auth.views import LoginView, LogoutView
 from core import views
 
+# Grouped under one prefix so non-listing requests skip these patterns with a single match.
+listing_patterns = [
+    path('', views.list_continents, name='list_continents'),
+    path('continent/<int:continent_id>/', views.list_countries, name='list_countries'),
+    path('country/<int:country_id>/', views.list_industries, name='list_industries'),
+    path('industry/<int:industry_id>/', views.list_companies, name='list_companies'),
+    path('company/<int:company_id>/', views.company_detail, name='company_detail'),
+    path('company/<int:company_id>/chat/', views.chat, name='chat'),
+    path('company/<int:company_id>/video/', views.video_chat, name='video_chat'),
+]
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('about/', views.about, name='about'),
@@ -12,13 +23,7 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('register/', views.register, name='register'),
     path('dashboard/', views.member_dashboard, name='dashboard'),
-    path('listings/', views.list_continents, name='list_continents'),
-    path('listings/continent/<int:continent_id>/', views.list_countries, name='list_countries'),
-    path('listings/country/<int:country_id>/', views.list_industries, name='list_industries'),
-    path('listings/industry/<int:industry_id>/', views.list_companies, name='list_companies'),
-    path('listings/company/<int:company_id>/', views.company_detail, name='company_detail'),
-    path('listings/company/<int:company_id>/chat/', views.chat, name='chat'),
-    path('listings/company/<int:company_id>/video/', views.video_chat, name='video_chat'),
+    path('listings/', include(listing_patterns)),
     path('analytics/', views.analytics_dashboard, name='analytics_dashboard'),
     path('payment/', views.payment, name='payment'),
     path('admin/analytics/', views.analytics_dashboard, name='analytics_dashboard'),
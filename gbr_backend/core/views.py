@@ -2,29 +2,72 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required
 from .forms import SignUpForm
-from .models import Continent, Country, Industry, Company, Member
+from .models import Continent, Country, Industry, Company, Member, Page
+from .signals import CONTINENTS_CACHE_KEY, COUNTRIES_CACHE_KEY, INDUSTRIES_CACHE_KEY
 from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
 from core.models import PageVisit
-from django.db.models import Count
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count, Q, Sum
+from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from django.utils.text import slugify
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.exceptions import RequestDataTooBig
+from django.http import Http404, JsonResponse
+from django.views.decorators.cache import cache_page
 from django.views.decorators.csrf import csrf_exempt
-import json
+from django.views.decorators.http import require_POST
+from django.views.decorators.vary import vary_on_cookie
+from datetime import datetime, time, timedelta
+import functools
+import logging
+import orjson
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Listings change rarely; entries are also invalidated by core.signals on save/delete.
+# The listing templates only render id and name, so the caches hold plain dicts.
+# settings.LISTING_CACHE_TIMEOUT depends on whether the cache is shared between workers.
+COUNTRIES_PER_PAGE = 50
+
+# Marketing pages have no database content. The header differs for logged-in members,
+# so the cached copies vary on the session cookie.
+STATIC_PAGE_CACHE_TIMEOUT = 60 * 15
+
+# GrapesJS bodies above this size are rejected with 413 before parsing.
+SAVE_PAGE_MAX_BYTES = 2_000_000
+
+# Visit totals only need to be roughly current for the dashboard.
+ANALYTICS_CACHE_KEY = 'analytics:counts:v1'
+ANALYTICS_CACHE_TIMEOUT = 60
 
 # Create your views here.
+@cache_page(STATIC_PAGE_CACHE_TIMEOUT)
+@vary_on_cookie
 def home(request):
     return render(request, 'index.html')
 
+@cache_page(STATIC_PAGE_CACHE_TIMEOUT)
+@vary_on_cookie
 def about(request):
     return render(request, 'pages/about.html')
 
+@cache_page(STATIC_PAGE_CACHE_TIMEOUT)
+@vary_on_cookie
 def contact(request):
     return render(request, 'pages/contact.html')
 
+@cache_page(STATIC_PAGE_CACHE_TIMEOUT)
+@vary_on_cookie
 def policies(request):
     return render(request, 'pages/policies.html')
 
+@cache_page(STATIC_PAGE_CACHE_TIMEOUT)
+@vary_on_cookie
 def faq(request):
     return render(request, 'pages/faq.html')
 
@@ -45,63 +88,137 @@ def member_dashboard(request):
     return render(request, 'member_dashboard.html', {'today': today})
 
 def list_continents(request):
-    continents = Continent.objects.all()
+    continents = cache.get_or_set(CONTINENTS_CACHE_KEY, lambda: list(Continent.objects.values('id', 'name').order_by('name')), settings.LISTING_CACHE_TIMEOUT)
     return render(request, 'listings/continents.html', {'continents': continents})
 
 def list_countries(request, continent_id):
     continent = get_object_or_404(Continent, id=continent_id)
-    countries = continent.countries.all()
-    return render(request, 'listings/countries.html', {'continent': continent, 'countries': countries})
+    countries = cache.get_or_set(
+        COUNTRIES_CACHE_KEY.format(continent_id=continent.id),
+        lambda: list(continent.countries.values('id', 'name').order_by('sort_order', 'name')),
+        settings.LISTING_CACHE_TIMEOUT,
+    )
+    # Paginate the cached list so large continents render a bounded page per request.
+    page_obj = Paginator(countries, COUNTRIES_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'listings/countries.html', {'continent': continent, 'countries': page_obj, 'page_obj': page_obj})
 
 def list_industries(request, country_id):
-    country = get_object_or_404(Country, id=country_id)
-    industries = country.industries.all()
+    # The template links back via country.continent; fetch it in the same query
+    country = get_object_or_404(Country.objects.select_related('continent'), id=country_id)
+    industries = cache.get_or_set(
+        INDUSTRIES_CACHE_KEY.format(country_id=country.id),
+        lambda: list(country.industries.values('id', 'name').order_by('sort_order', 'name')),
+        settings.LISTING_CACHE_TIMEOUT,
+    )
     return render(request, 'listings/industries.html', {'country': country, 'industries': industries})
 
 def list_companies(request, industry_id):
-    industry = get_object_or_404(Industry, id=industry_id)
-    companies = industry.companies.all()
+    # The template links back via industry.country; fetch it in the same query
+    industry = get_object_or_404(Industry.objects.select_related('country'), id=industry_id)
+    # industry_id is read back when the related manager attaches each row to the industry.
+    companies = industry.companies.only('id', 'name', 'description', 'industry_id')
     return render(request, 'listings/companies.html', {'industry': industry, 'companies': companies})
 
+@functools.lru_cache(maxsize=128)
+def _bulk_sort_order_sql(db_table, pk_column, count):
+    """UPDATE ... SET sort_order = CASE pk WHEN %s THEN %s ... END WHERE pk IN (...) for ``count`` rows."""
+    qn = connection.ops.quote_name
+    whens = ' '.join(['WHEN %s THEN %s'] * count)
+    placeholders = ', '.join(['%s'] * count)
+    return (
+        f'UPDATE {qn(db_table)} SET {qn("sort_order")} = CASE {qn(pk_column)} {whens} END '
+        f'WHERE {qn(pk_column)} IN ({placeholders})'
+    )
+
+def execute_bulk_update(model, updates, user):
+    """Apply drag & drop reorders as a single CASE/WHEN UPDATE per batch.
+
+    ``updates`` is a list of ``{'item_id': ..., 'new_position': ...}`` dicts;
+    ``user`` is the member performing the reorder. The SQL for each batch size
+    is generated once and reused; only the parameters change between calls.
+    """
+    if not updates:
+        return {'success': True, 'updated': 0}
+    # Each row binds three parameters: the WHEN pk, the THEN value and the IN list entry.
+    max_params = connection.features.max_query_params
+    batch_size = max(1, max_params // 3) if max_params else len(updates)
+    db_table = model._meta.db_table
+    pk_column = model._meta.pk.column
+    updated = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(updates), batch_size):
+            batch = updates[start:start + batch_size]
+            params = []
+            for u in batch:
+                params.extend((u['item_id'], u['new_position']))
+            params.extend(u['item_id'] for u in batch)
+            cursor.execute(_bulk_sort_order_sql(db_table, pk_column, len(batch)), params)
+            updated += cursor.rowcount
+    return {'success': True, 'updated': updated}
+
 def company_detail(request, company_id):
-    company = get_object_or_404(Company, id=company_id)
-    return render(request, 'listings/company_detail.html', {'company': company})
+    # The card is a template fragment cached on company_id, so the company is only loaded
+    # (or found missing) when the fragment has to be rendered.
+    def load_company():
+        company = Company.objects.filter(id=company_id).values(
+            'id', 'name', 'description', 'contact_info', 'chat_code', 'industry_id',
+        ).first()
+        if company is None:
+            raise Http404('No Company matches the given query.')
+        return company
+    return render(request, 'listings/company_detail.html', {
+        'company_id': company_id,
+        'company': SimpleLazyObject(load_company),
+        'fragment_timeout': settings.LISTING_CACHE_TIMEOUT,
+    })
+
+def _visit_counts():
+    # Compare against datetime cutoffs rather than timestamp__date so the timestamp index is usable.
+    today_start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    week_start = today_start - timedelta(days=7)
+    month_start = today_start - timedelta(days=30)
+    # Visits are stored as per-minute buckets, so sum the bucket counts in one pass.
+    counts = PageVisit.objects.aggregate(
+        total=Sum('count'),
+        daily=Sum('count', filter=Q(timestamp__gte=today_start)),
+        weekly=Sum('count', filter=Q(timestamp__gte=week_start)),
+        monthly=Sum('count', filter=Q(timestamp__gte=month_start)),
+    )
+    return {key: value or 0 for key, value in counts.items()}
 
 @staff_member_required
 def analytics_dashboard(request):
-    today = timezone.now().date()
-    visits = PageVisit.objects.all()
-    total_visits = visits.count()
-    daily_visits = visits.filter(timestamp__date=today).count()
-    weekly_visits = visits.filter(timestamp__date__gte=today - timezone.timedelta(days=7)).count()
-    monthly_visits = visits.filter(timestamp__date__gte=today - timezone.timedelta(days=30)).count()
+    counts = cache.get_or_set(ANALYTICS_CACHE_KEY, _visit_counts, ANALYTICS_CACHE_TIMEOUT)
     return render(request, 'analytics/analytics.html', {
-        'total_visits': total_visits,
-        'daily_visits': daily_visits,
-        'weekly_visits': weekly_visits,
-        'monthly_visits': monthly_visits,
+        'total_visits': counts['total'],
+        'daily_visits': counts['daily'],
+        'weekly_visits': counts['weekly'],
+        'monthly_visits': counts['monthly'],
     })
 
 def chat(request, company_id):
-    company = get_object_or_404(Company, id=company_id)
-    return render(request, 'chat.html', {'company': company})
+    if not Company.objects.filter(id=company_id).exists():
+        raise Http404('No Company matches the given query.')
+    return render(request, 'chat.html', {'company': {'id': company_id}})
 
 def video_chat(request, company_id):
-    company = get_object_or_404(Company, id=company_id)
-    return render(request, 'video_chat.html', {'company': company})
+    if not Company.objects.filter(id=company_id).exists():
+        raise Http404('No Company matches the given query.')
+    return render(request, 'video_chat.html', {'company': {'id': company_id}})
 
+@login_required
 def payment(request):
     if request.method == 'POST':
-        member = request.user if request.user.is_authenticated else None
-        if member:
-            member.payment_status = 'paid'
-            member.last_payment_date = timezone.now()
-            member.next_due_date = timezone.now().date() + timezone.timedelta(days=365)
-            member.expiry_date = member.next_due_date
-            member.save()
-            return render(request, 'payment_success.html')
-        else:
-            return render(request, 'payment_failed.html')
+        now = timezone.now()
+        next_due_date = now.date() + timedelta(days=365)
+        # One UPDATE of the payment columns; no instance save or signals needed.
+        Member.objects.filter(pk=request.user.pk).update(
+            payment_status='paid',
+            last_payment_date=now,
+            next_due_date=next_due_date,
+            expiry_date=next_due_date,
+        )
+        return render(request, 'payment_success.html')
     return render(request, 'payment.html')
 
 
@@ -116,46 +233,59 @@ def page_builder(request):
     return render(request, 'page_builder.html')
 
 
+def _page_field(data, key):
+    """Return ``data[key]`` as a string; a missing or null value becomes ''."""
+    value = data.get(key)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise ValueError(f"'{key}' must be a string")
+    return value
+
 @csrf_exempt
 @login_required
+@require_POST
 def save_page(request):
     """Save page content from GrapesJS editor"""
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            html_content = data.get('html', '')
-            css_content = data.get('css', '')
-            
-            # Here you can save to database or file system
-            # For now, we'll save to a simple file
-            page_content = {
-                'html': html_content,
-                'css': css_content,
-                'created_by': request.user.username,
-                'created_at': timezone.now().isoformat()
-            }
-            
-            # Save to file (you might want to save to database instead)
-            import os
-            pages_dir = os.path.join('static', 'pages')
-            os.makedirs(pages_dir, exist_ok=True)
-            
-            filename = f"page_{request.user.id}_{int(timezone.now().timestamp())}.json"
-            filepath = os.path.join(pages_dir, filename)
-            
-            with open(filepath, 'w') as f:
-                json.dump(page_content, f, indent=2)
-            
-            return JsonResponse({
-                'success': True,
-                'message': 'Page saved successfully',
-                'filename': filename
-            })
-            
-        except Exception as e:
-            return JsonResponse({
-                'success': False,
-                'error': str(e)
-            })
-    
-    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+    # Django refuses to read bodies over DATA_UPLOAD_MAX_MEMORY_SIZE; ours is a tighter cap.
+    try:
+        body = request.body
+    except RequestDataTooBig:
+        body = None
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid Content-Length header'}, status=400)
+    if body is None or len(body) > SAVE_PAGE_MAX_BYTES:
+        return JsonResponse({'success': False, 'error': 'Page content too large'}, status=413)
+    try:
+        data = orjson.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError('Expected a JSON object')
+        html_content = _page_field(data, 'html')
+        css_content = _page_field(data, 'css')
+        title = (_page_field(data, 'title') or f"Page by {request.user.username}")[:200]
+    except (ValueError, KeyError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+    # The editor does not send a slug, so derive a unique one from the title.
+    slug = f"{slugify(title)[:190] or 'page'}-{uuid.uuid4().hex[:8]}"
+    try:
+        page = Page.objects.create(
+            title=title,
+            slug=slug,
+            html_content=html_content,
+            css_content=css_content,
+            created_by=request.user,
+        )
+    except DatabaseError:
+        logger.exception('Failed to save page for member %s', request.user.pk)
+        return JsonResponse({'success': False, 'error': 'Could not save page'}, status=500)
+
+    return JsonResponse({
+        'success': True,
+        'message': 'Page saved successfully',
+        'page_id': page.id,
+        'slug': page.slug,
+    })
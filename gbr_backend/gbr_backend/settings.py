@@ -53,6 +53,9 @@ MIDDLEWARE = [
     'core.middleware.PageVisitMiddleware',
 ]
 
+# Set to False to drop PageVisitMiddleware from the stack (e.g. in development).
+PAGE_VISIT_LOGGING_ENABLED = True
+
 ROOT_URLCONF = 'gbr_backend.urls'
 
 # Templates configuration
@@ -83,9 +86,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections stay off: HTTP is served through ASGI (asgi.py), where Django
+        # recommends disabling them, and SQLite gains nothing. A WSGI/PostgreSQL deployment can
+        # opt in with DB_CONN_MAX_AGE (e.g. 60), or use a pooler such as PgBouncer.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+REDIS_URL = os.environ.get('REDIS_URL')
+
+# core.signals deletes listing and fragment entries on save, which only reaches every
+# worker when the cache is shared. Use Redis when REDIS_URL is set; the per-process
+# fallback keeps listings for a few seconds so other workers catch up quickly.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+    LISTING_CACHE_TIMEOUT = 3600
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gbr-default',
+        }
+    }
+    LISTING_CACHE_TIMEOUT = 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,8 +168,30 @@ LOGIN_URL = "login"
 
 AUTH_USER_MODEL = 'core.Member'
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+# ModelBackend stays listed so sessions created before MemberBackend still resolve.
+AUTHENTICATION_BACKENDS = [
+    'core.backends.MemberBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Use Redis pub/sub when REDIS_URL is set so broadcasts share one multiplexed
+# connection per worker; fall back to the in-memory layer for local development.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": [REDIS_URL],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {
+                "capacity": 1500,
+                "expiry": 10,
+            },
+        }
     }
-}